@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+import argparse
+import dataclasses
+import json
+import time
+import tracemalloc
+from enum import Enum
+
+from swarmjanitor.core import SystemInfo
+from swarmjanitor.dockerclient import NodeAvailability, NodeInfo, NodeState
+from swarmjanitor.utils import SmartEncoder
+
+
+class AsDictEncoder(json.JSONEncoder):
+    def default(self, o):
+        if dataclasses.is_dataclass(o):
+            return dataclasses.asdict(o)
+
+        if isinstance(o, Enum):
+            return o.value
+
+        return super().default(o)
+
+
+def system_info(node_count: int) -> SystemInfo:
+    nodes = [
+        NodeInfo(
+            node_id='node%021d' % index,
+            hostname='ip-10-0-%d-%d' % (index // 256, index % 256),
+            status=NodeState.READY,
+            availability=NodeAvailability.ACTIVE,
+            address='10.0.%d.%d' % (index // 256, index % 256),
+            labels={'availability_zone': 'eu-west-1%s' % 'abc'[index % 3]},
+            is_manager=index < 3,
+            manager_address='10.0.0.%d:2377' % index if index < 3 else None,
+            manager_is_leader=index == 0 if index < 3 else None
+        )
+        for index in range(node_count)
+    ]
+
+    return SystemInfo(
+        availability_zone='eu-west-1a',
+        is_swarm_active=True,
+        is_manager=True,
+        is_worker=False,
+        is_leader=True,
+        nodes=nodes,
+        possible_manager_nodes=['10.0.0.0', '10.0.0.1', '10.0.0.2']
+    )
+
+
+def measure(encoder, payload, repeat: int):
+    tracemalloc.start()
+    json.dumps(payload, cls=encoder)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        json.dumps(payload, cls=encoder)
+    elapsed = time.perf_counter() - start
+
+    return peak_bytes, elapsed / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares the JSON encoders used for the HTTP payloads.')
+    parser.add_argument('--nodes', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    payload = system_info(args.nodes)
+    assert json.dumps(payload, cls=AsDictEncoder) == json.dumps(payload, cls=SmartEncoder)
+
+    print('%-16s %14s %14s' % ('encoder', 'peak KiB', 'ms/encode'))
+    for encoder in [AsDictEncoder, SmartEncoder]:
+        peak_bytes, seconds = measure(encoder, payload, args.repeat)
+        print('%-16s %14.1f %14.3f' % (encoder.__name__, peak_bytes / 1024, seconds * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -24,8 +24,31 @@ class JanitorConfig:
     interval_prune_nodes: int
     interval_prune_system: int
     interval_refresh_auth: int
+    interval_prune_services: int
+    interval_rebalance_services: int
+    interval_memory_check: int
+    interval_inventory: int
     prune_images: bool
     prune_volumes: bool
+    prune_services: bool
+    prune_services_dry_run: bool
+    prune_services_image_pattern: str
+    prune_services_label: str
+    prune_services_min_age: int
+    prune_services_batch_size: int
+    rebalance_services: bool
+    rebalance_max_skew: int
+    rebalance_max_services: int
+    rebalance_cooldown: int
+    inventory: bool
+    inventory_concurrency: int
+    peer_failure_threshold: int
+    peer_backoff_initial: int
+    peer_backoff_max: int
+    memory_limit: int
+    memory_soft_threshold: float
+    memory_hard_threshold: float
+    debug_endpoints: bool
 
     @classmethod
     def from_env(cls):
@@ -39,6 +62,29 @@ class JanitorConfig:
             interval_prune_nodes=int(os.getenv('SWARM_INTERVAL_PRUNE_NODES', '30')),
             interval_prune_system=int(os.getenv('SWARM_INTERVAL_PRUNE_SYSTEM', '86400')),
             interval_refresh_auth=int(os.getenv('SWARM_INTERVAL_REFRESH_AUTH', '3600')),
+            interval_prune_services=int(os.getenv('SWARM_INTERVAL_PRUNE_SERVICES', '3600')),
+            interval_rebalance_services=int(os.getenv('SWARM_INTERVAL_REBALANCE_SERVICES', '300')),
+            interval_memory_check=int(os.getenv('SWARM_INTERVAL_MEMORY_CHECK', '5')),
+            interval_inventory=int(os.getenv('SWARM_INTERVAL_INVENTORY', '300')),
             prune_images=_str_to_bool(os.getenv('SWARM_PRUNE_IMAGES', 'false')),
-            prune_volumes=_str_to_bool(os.getenv('SWARM_PRUNE_VOLUMES', 'false'))
+            prune_volumes=_str_to_bool(os.getenv('SWARM_PRUNE_VOLUMES', 'false')),
+            prune_services=_str_to_bool(os.getenv('SWARM_PRUNE_SERVICES', 'false')),
+            prune_services_dry_run=_str_to_bool(os.getenv('SWARM_PRUNE_SERVICES_DRY_RUN', 'true')),
+            prune_services_image_pattern=os.getenv('SWARM_PRUNE_SERVICES_IMAGE_PATTERN', ''),
+            prune_services_label=os.getenv('SWARM_PRUNE_SERVICES_LABEL', ''),
+            prune_services_min_age=int(os.getenv('SWARM_PRUNE_SERVICES_MIN_AGE', '86400')),
+            prune_services_batch_size=int(os.getenv('SWARM_PRUNE_SERVICES_BATCH_SIZE', '10')),
+            rebalance_services=_str_to_bool(os.getenv('SWARM_REBALANCE_SERVICES', 'false')),
+            rebalance_max_skew=int(os.getenv('SWARM_REBALANCE_MAX_SKEW', '1')),
+            rebalance_max_services=int(os.getenv('SWARM_REBALANCE_MAX_SERVICES', '1')),
+            rebalance_cooldown=int(os.getenv('SWARM_REBALANCE_COOLDOWN', '1800')),
+            inventory=_str_to_bool(os.getenv('SWARM_INVENTORY', 'false')),
+            inventory_concurrency=int(os.getenv('SWARM_INVENTORY_CONCURRENCY', '8')),
+            peer_failure_threshold=int(os.getenv('SWARM_PEER_FAILURE_THRESHOLD', '3')),
+            peer_backoff_initial=int(os.getenv('SWARM_PEER_BACKOFF_INITIAL', '60')),
+            peer_backoff_max=int(os.getenv('SWARM_PEER_BACKOFF_MAX', '3600')),
+            memory_limit=int(os.getenv('SWARM_MEMORY_LIMIT', '0')),
+            memory_soft_threshold=float(os.getenv('SWARM_MEMORY_SOFT_THRESHOLD', '0.7')),
+            memory_hard_threshold=float(os.getenv('SWARM_MEMORY_HARD_THRESHOLD', '0.85')),
+            debug_endpoints=_str_to_bool(os.getenv('SWARM_DEBUG_ENDPOINTS', 'false'))
         )
@@ -1,13 +1,21 @@
 import base64
+import collections
 import logging
+import re
+import time
 from dataclasses import dataclass
-from typing import List, Optional
-
-import requests
+from datetime import datetime, timezone
+from enum import Enum, unique
+from typing import Dict, List, Optional, Tuple
 
 from swarmjanitor.awsclient import JanitorAwsClient
 from swarmjanitor.config import DesiredRole, JanitorConfig
-from swarmjanitor.dockerclient import JanitorDockerClient, LocalNodeState, LoginData, NodeInfo, NodeState, SwarmInfo
+from swarmjanitor.dockerclient import (
+    JanitorDockerClient, LocalNodeState, LoginData, NodeAvailability, NodeInfo, NodeState, ServiceInfo, SwarmInfo
+)
+from swarmjanitor.peerclient import JanitorPeerClient, PeerUnavailableError
+
+UNSETTLED_UPDATE_STATES = ('updating', 'paused', 'rollback_started', 'rollback_paused')
 
 
 class JanitorError(RuntimeError):
@@ -29,8 +37,14 @@ class SwarmRoleError(JanitorError):
     message = 'Swarm is active but the desired role does not match.'
 
 
+class InventoryUnavailableError(JanitorError):
+    message = 'The cluster inventory is not available on this node.'
+
+
 @dataclass(frozen=True)
 class JoinInfo:
+    __slots__ = ('address', 'manager', 'worker')
+
     address: str
     manager: str
     worker: str
@@ -38,6 +52,11 @@ class JoinInfo:
 
 @dataclass(frozen=True)
 class SystemInfo:
+    __slots__ = (
+        'availability_zone', 'is_swarm_active', 'is_manager', 'is_worker', 'is_leader',
+        'nodes', 'possible_manager_nodes'
+    )
+
     availability_zone: str
     is_swarm_active: bool
     is_manager: bool
@@ -47,15 +66,65 @@ class SystemInfo:
     possible_manager_nodes: List[str]
 
 
+@dataclass(frozen=True)
+class PruneSummary:
+    __slots__ = ('finished_at', 'space_reclaimed')
+
+    finished_at: str
+    space_reclaimed: int
+
+
+@unique
+class ServicePruneReason(Enum):
+    COMPLETED = 'completed'
+    NO_REPLICAS = 'no_replicas'
+    MATCHED = 'matched'
+
+
+@dataclass(frozen=True)
+class ServicePruneCandidate:
+    __slots__ = ('service_id', 'name', 'reason', 'age')
+
+    service_id: str
+    name: str
+    reason: ServicePruneReason
+    age: int
+
+
+@dataclass(frozen=True)
+class ServicePruneReport:
+    __slots__ = ('dry_run', 'batch', 'remaining')
+
+    dry_run: bool
+    batch: List[ServicePruneCandidate]
+    remaining: int
+
+
 class JanitorCore:
     config: JanitorConfig
     aws_client: JanitorAwsClient
     docker_client: JanitorDockerClient
+    peer_client: JanitorPeerClient
+
+    last_prune: Optional[PruneSummary] = None
 
-    def __init__(self, config: JanitorConfig, aws_client: JanitorAwsClient, docker_client: JanitorDockerClient):
+    _rebalanced_at: Dict[str, float]
+    _rebalanced_layouts: Dict[str, Tuple]
+
+    def __init__(
+            self,
+            config: JanitorConfig,
+            aws_client: JanitorAwsClient,
+            docker_client: JanitorDockerClient,
+            peer_client: JanitorPeerClient
+    ):
         self.config = config
         self.aws_client = aws_client
         self.docker_client = docker_client
+        self.peer_client = peer_client
+
+        self._rebalanced_at = {}
+        self._rebalanced_layouts = {}
 
     def _discover_possible_manager_addresses(self) -> List[str]:
         self.aws_client.refresh_session()
@@ -90,15 +159,20 @@ class JanitorCore:
         return self.docker_client.node_info(swarm_info.node_id).manager_is_leader
 
     def prune_system(self):
-        self.docker_client.prune_containers()
+        space_reclaimed = self.docker_client.prune_containers()
 
         if self.config.prune_images:
-            self.docker_client.prune_images()
+            space_reclaimed += self.docker_client.prune_images()
 
-        self.docker_client.prune_networks()
+        space_reclaimed += self.docker_client.prune_networks()
 
         if self.config.prune_volumes:
-            self.docker_client.prune_volumes()
+            space_reclaimed += self.docker_client.prune_volumes()
+
+        self.last_prune = PruneSummary(
+            finished_at=datetime.now(timezone.utc).isoformat(),
+            space_reclaimed=space_reclaimed
+        )
 
     def refresh_auth(self):
         if not self._is_leader():
@@ -120,20 +194,15 @@ class JanitorCore:
         for node in self._list_nodes():
             node_id = node.node_id
             try:
-                node_address = node.address
-                url = 'http://%s:2380/system' % node_address
-                response = requests.get(url, timeout=2.0)
-                status_code = response.status_code
-                logging.info('GET "%s" %s', url, status_code)
-                response.raise_for_status()
-
-                system_info = SystemInfo(**response.json())
+                system_info = SystemInfo(**self.peer_client.get_json(node.address, '/system'))
 
                 label_key = 'availability_zone'
                 label_value = system_info.availability_zone
 
                 logging.info('Assigning label "%s=%s" to node %s ...', label_key, label_value, node_id)
                 self.docker_client.label_node(node_id, label_key, label_value)
+            except PeerUnavailableError as error:
+                logging.info('Skipped labelling node %s: %s', node_id, error)
             except:
                 logging.warning('Failed to assign label to node %s.', node_id, exc_info=True)
 
@@ -169,13 +238,7 @@ class JanitorCore:
 
         for manager_address in manager_addresses:
             try:
-                url = 'http://%s:2380/join' % manager_address
-                response = requests.get(url, timeout=2.0)
-                status_code = response.status_code
-                logging.info('GET "%s" %s', url, status_code)
-                response.raise_for_status()
-
-                join_info = JoinInfo(**response.json())
+                join_info = JoinInfo(**self.peer_client.get_json(manager_address, '/join'))
 
                 join_address = join_info.address
                 join_token = join_info.manager if desired_role == DesiredRole.MANAGER else join_info.worker
@@ -184,6 +247,9 @@ class JanitorCore:
                 self.docker_client.join_swarm(join_address, join_token)
 
                 return
+            except PeerUnavailableError as error:
+                logging.info('Skipped joining the swarm via %s: %s', manager_address, error)
+                continue
             except:
                 logging.warning('Failed to join the swarm via %s.', manager_address, exc_info=True)
                 continue
@@ -218,6 +284,140 @@ class JanitorCore:
         except JanitorError as error:
             logging.info('Skipped pruning nodes: %s', error.message)
 
+    def _find_prunable_services(self) -> List[ServicePruneCandidate]:
+        now = datetime.now(timezone.utc)
+        candidates: List[ServicePruneCandidate] = []
+
+        for service in self.docker_client.list_services():
+            age = int((now - service.last_active_at).total_seconds())
+            if age < self.config.prune_services_min_age:
+                continue
+
+            reason = _service_prune_reason(service, self.config)
+            if reason is not None:
+                candidates.append(ServicePruneCandidate(service.service_id, service.name, reason, age))
+
+        return sorted(candidates, key=lambda candidate: candidate.age, reverse=True)
+
+    def prune_services(self, dry_run: bool) -> ServicePruneReport:
+        if not self._is_leader():
+            raise SwarmLeaderError
+
+        candidates = self._find_prunable_services()
+        batch_size = self.config.prune_services_batch_size
+        batch = candidates[:batch_size]
+        removed: List[ServicePruneCandidate] = []
+
+        for candidate in batch:
+            if dry_run:
+                logging.info('Dry run: would remove the service "%s" (%s).', candidate.name, candidate.reason.value)
+                continue
+
+            try:
+                logging.info('Removing the service "%s" (%s) ...', candidate.name, candidate.reason.value)
+                self.docker_client.remove_service(candidate.service_id)
+                removed.append(candidate)
+            except:
+                logging.warning('Failed to remove the service "%s".', candidate.name, exc_info=True)
+                continue
+
+        remaining = len(candidates) - len(batch)
+        logging.info('Pruned %d services, %d candidates remaining.', len(removed), remaining)
+
+        return ServicePruneReport(dry_run=dry_run, batch=batch if dry_run else removed, remaining=remaining)
+
+    def prune_services_skip(self):
+        if not self.config.prune_services:
+            return
+
+        try:
+            self.prune_services(self.config.prune_services_dry_run)
+        except JanitorError as error:
+            logging.info('Skipped pruning services: %s', error.message)
+
+    def prune_services_report(self) -> ServicePruneReport:
+        return self.prune_services(dry_run=True)
+
+    def rebalance_services(self):
+        if not self._is_leader():
+            raise SwarmLeaderError
+
+        nodes = [
+            node for node in self._list_nodes()
+            if node.status == NodeState.READY and node.availability == NodeAvailability.ACTIVE
+        ]
+
+        now = time.monotonic()
+        cooldown = self.config.rebalance_cooldown
+        self._rebalanced_at = {
+            service_id: rebalanced_at for service_id, rebalanced_at in self._rebalanced_at.items()
+            if now - rebalanced_at < cooldown
+        }
+
+        services = self.docker_client.list_services()
+        service_ids = {service.service_id for service in services}
+        self._rebalanced_layouts = {
+            service_id: layout for service_id, layout in self._rebalanced_layouts.items() if service_id in service_ids
+        }
+
+        rebalanced_count = 0
+        for service in services:
+            if rebalanced_count >= self.config.rebalance_max_services:
+                logging.info('Reached the maximum number of rebalanced services for this run.')
+                return
+
+            if service.mode != 'Replicated' or (service.replicas or 0) < 2:
+                continue
+            if service.update_state in UNSETTLED_UPDATE_STATES or service.service_id in self._rebalanced_at:
+                continue
+
+            eligible_nodes = _eligible_nodes(service, nodes)
+            if eligible_nodes is None:
+                logging.debug('Skipped rebalancing the service "%s": Unsupported placement.', service.name)
+                continue
+            if len(eligible_nodes) < 2:
+                continue
+
+            skew = _task_skew(service, eligible_nodes)
+            if skew <= self.config.rebalance_max_skew:
+                continue
+
+            layout = _task_layout(service, eligible_nodes)
+            if self._rebalanced_layouts.get(service.service_id, None) == layout:
+                logging.debug('Skipped rebalancing the service "%s": The last update kept the layout.', service.name)
+                continue
+
+            try:
+                logging.info('Rebalancing the service "%s" (skew: %d) ...', service.name, skew)
+                self.docker_client.force_update_service(service.service_id)
+                self._rebalanced_at[service.service_id] = now
+                self._rebalanced_layouts[service.service_id] = layout
+                rebalanced_count += 1
+            except:
+                logging.warning('Failed to rebalance the service "%s".', service.name, exc_info=True)
+                continue
+
+    def rebalance_services_skip(self):
+        if not self.config.rebalance_services:
+            return
+
+        try:
+            self.rebalance_services()
+        except JanitorError as error:
+            logging.info('Skipped rebalancing services: %s', error.message)
+
+    def is_manager(self) -> bool:
+        return _is_manager(self.docker_client.swarm_info())
+
+    def is_leader(self) -> bool:
+        return self._is_leader()
+
+    def leader_nodes(self) -> List[NodeInfo]:
+        if not self._is_leader():
+            raise SwarmLeaderError
+
+        return self._list_nodes()
+
     def join_info(self) -> JoinInfo:
         swarm_info = self.docker_client.swarm_info()
 
@@ -258,3 +458,95 @@ def _is_manager(swarm_info: SwarmInfo) -> bool:
 
 def _is_worker(swarm_info: SwarmInfo) -> bool:
     return _is_swarm_active(swarm_info) and not _is_manager(swarm_info)
+
+
+def _service_prune_reason(service: ServiceInfo, config: JanitorConfig) -> Optional[ServicePruneReason]:
+    task_states = service.task_states
+    if 'complete' in task_states and all(state in ('complete', 'shutdown') for state in task_states):
+        return ServicePruneReason.COMPLETED
+
+    if service.replicas == 0 and not task_states:
+        return ServicePruneReason.NO_REPLICAS
+
+    image_pattern = config.prune_services_image_pattern
+    label_filter = config.prune_services_label
+    if not image_pattern and not label_filter:
+        return None
+
+    if image_pattern and not (service.image and re.search(image_pattern, service.image)):
+        return None
+
+    if label_filter:
+        label_key, _, label_value = label_filter.partition('=')
+        if label_key not in service.labels or (label_value and service.labels[label_key] != label_value):
+            return None
+
+    return ServicePruneReason.MATCHED
+
+
+def _matches_constraint(node: NodeInfo, constraint: str) -> Optional[bool]:
+    match = re.fullmatch(r'\s*([\w.-]+)\s*(==|!=)\s*(.*?)\s*', constraint)
+    if match is None:
+        return None
+
+    attribute, comparison, expected = match.groups()
+
+    if attribute == 'node.id':
+        actual = node.node_id
+    elif attribute == 'node.hostname':
+        actual = node.hostname
+    elif attribute == 'node.role':
+        actual = 'manager' if node.is_manager else 'worker'
+    elif attribute.startswith('node.labels.'):
+        actual = node.labels.get(attribute[len('node.labels.'):], None)
+    else:
+        return None
+
+    # Docker compares constraint values case-insensitively; a missing label only satisfies "!=".
+    matched = actual is not None and actual.lower() == expected.lower()
+    return matched == (comparison == '==')
+
+
+def _eligible_nodes(service: ServiceInfo, nodes: List[NodeInfo]) -> Optional[List[NodeInfo]]:
+    # The nodes do not report their platform and the per-node limit makes an even spread impossible to judge,
+    # so such services are treated like unsupported constraints.
+    if service.max_replicas_per_node or service.platforms:
+        return None
+
+    eligible_nodes: List[NodeInfo] = []
+
+    for node in nodes:
+        matches = [_matches_constraint(node, constraint) for constraint in service.constraints]
+        if None in matches:
+            return None
+        if all(matches):
+            eligible_nodes.append(node)
+
+    return eligible_nodes
+
+
+def _task_layout(service: ServiceInfo, eligible_nodes: List[NodeInfo]) -> Tuple:
+    tasks_per_node = collections.Counter(service.running_node_ids)
+    return tuple(sorted((node.node_id, tasks_per_node[node.node_id]) for node in eligible_nodes))
+
+
+def _task_skew(service: ServiceInfo, eligible_nodes: List[NodeInfo]) -> int:
+    tasks_per_node = collections.Counter(service.running_node_ids)
+    label_keys = [
+        spread_label[len('node.labels.'):]
+        for spread_label in service.spread_labels if spread_label.startswith('node.labels.')
+    ]
+
+    # Spread preferences are applied hierarchically, so only siblings below the same parent group are compared:
+    # the label groups at each level and finally the nodes within the innermost group.
+    skews: List[int] = []
+    for depth in range(len(label_keys) + 1):
+        siblings: Dict[Tuple, Dict[Optional[str], int]] = collections.defaultdict(lambda: collections.defaultdict(int))
+        for node in eligible_nodes:
+            path = tuple(node.labels.get(label_key, None) for label_key in label_keys)
+            child = path[depth] if depth < len(label_keys) else node.node_id
+            siblings[path[:depth]][child] += tasks_per_node[node.node_id]
+
+        skews.extend(max(counts.values()) - min(counts.values()) for counts in siblings.values())
+
+    return max(skews)
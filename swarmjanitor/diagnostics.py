@@ -0,0 +1,140 @@
+import collections
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from typing import Counter, Dict, List, Optional
+
+MAX_PROFILE_SECONDS = 60
+SAMPLE_INTERVAL_SECONDS = 0.01
+TRACEMALLOC_FRAMES = 10
+
+
+class JanitorDiagnostics:
+    _heap_lock: threading.Lock
+    _heap_snapshot: Optional[tracemalloc.Snapshot]
+
+    def __init__(self):
+        self._heap_lock = threading.Lock()
+        self._heap_snapshot = None
+
+    @staticmethod
+    def _thread_names() -> Dict[int, str]:
+        return {thread.ident: thread.name for thread in threading.enumerate()}
+
+    def thread_stacks(self) -> str:
+        thread_names = self._thread_names()
+        lines: List[str] = []
+
+        for thread_id, frame in sys._current_frames().items():
+            lines.append('Thread "%s" (%s):' % (thread_names.get(thread_id, '?'), thread_id))
+            lines.extend(line.rstrip('\n') for line in traceback.format_stack(frame))
+            lines.append('')
+
+        return '\n'.join(lines)
+
+    def profile(self, seconds: float, limit: int = 30) -> str:
+        seconds = min(max(seconds, SAMPLE_INTERVAL_SECONDS), MAX_PROFILE_SECONDS)
+        own_thread_id = threading.get_ident()
+
+        own_samples: Counter[str] = collections.Counter()
+        cumulative_samples: Counter[str] = collections.Counter()
+        thread_samples: Counter[int] = collections.Counter()
+        sample_count = 0
+
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread_id:
+                    continue
+
+                thread_samples[thread_id] += 1
+                own_samples[_frame_label(frame)] += 1
+
+                seen = set()
+                while frame is not None:
+                    label = _frame_label(frame)
+                    if label not in seen:
+                        seen.add(label)
+                        cumulative_samples[label] += 1
+                    frame = frame.f_back
+
+            sample_count += 1
+            time.sleep(SAMPLE_INTERVAL_SECONDS)
+
+        thread_names = self._thread_names()
+        thread_sample_count = max(sum(thread_samples.values()), 1)
+        lines = [
+            'Collected %d samples of %d threads in %.1f seconds.' % (sample_count, len(thread_samples), seconds),
+            'Percentages are relative to all %d thread samples.' % thread_sample_count,
+            '',
+            'Samples per thread:'
+        ]
+        for thread_id, count in thread_samples.most_common():
+            lines.append('%8d  %s' % (count, thread_names.get(thread_id, thread_id)))
+
+        for title, samples in [('Own samples', own_samples), ('Cumulative samples', cumulative_samples)]:
+            lines.extend(['', '%s:' % title])
+            for label, count in samples.most_common(limit):
+                lines.append('%8d  %5.1f%%  %s' % (count, 100.0 * count / thread_sample_count, label))
+
+        return '\n'.join(lines)
+
+    def heap_snapshot(self, limit: int = 25) -> str:
+        with self._heap_lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                self._heap_snapshot = None
+                return 'Started tracing memory allocations. Request the snapshot again to see the results.'
+
+            snapshot = _take_snapshot()
+            self._heap_snapshot = snapshot
+
+        statistics = snapshot.statistics('lineno')
+        return _format_statistics(statistics, limit, 'Top %d allocations' % limit)
+
+    def heap_diff(self, limit: int = 25) -> str:
+        with self._heap_lock:
+            if not tracemalloc.is_tracing() or self._heap_snapshot is None:
+                return 'No previous snapshot available. Request a snapshot first.'
+
+            snapshot = _take_snapshot()
+            statistics = snapshot.compare_to(self._heap_snapshot, 'lineno')
+            self._heap_snapshot = snapshot
+
+        return _format_statistics(statistics, limit, 'Top %d differences since the previous snapshot' % limit)
+
+    def heap_stop(self) -> str:
+        with self._heap_lock:
+            self._heap_snapshot = None
+
+            if not tracemalloc.is_tracing():
+                return 'Memory allocations are not being traced.'
+
+            tracemalloc.stop()
+            return 'Stopped tracing memory allocations.'
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return '%s:%d(%s)' % (code.co_filename, frame.f_lineno, code.co_name)
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<unknown>')
+    ])
+
+
+def _format_statistics(statistics: List, limit: int, title: str) -> str:
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [
+        'Traced memory: current=%d KiB, peak=%d KiB' % (current // 1024, peak // 1024),
+        '',
+        '%s:' % title
+    ]
+    lines.extend(str(statistic) for statistic in statistics[:limit])
+    return '\n'.join(lines)
@@ -1,16 +1,22 @@
 import logging
+from collections import defaultdict
 from dataclasses import dataclass
+from datetime import datetime
 from enum import Enum, unique
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import docker
 from docker import DockerClient, auth
 from docker.models.nodes import Node
 from docker.models.services import Service
 
+from swarmjanitor.utils import parse_docker_timestamp
+
 
 @dataclass(frozen=True)
 class LoginData:
+    __slots__ = ('username', 'password', 'registry')
+
     username: str
     password: str
     registry: str
@@ -18,6 +24,8 @@ class LoginData:
 
 @dataclass(frozen=True)
 class ManagerInfo:
+    __slots__ = ('node_id', 'addr')
+
     node_id: str
     addr: str
 
@@ -34,6 +42,8 @@ class LocalNodeState(Enum):
 
 @dataclass(frozen=True)
 class SwarmInfo:
+    __slots__ = ('local_node_state', 'node_id', 'remote_managers')
+
     local_node_state: LocalNodeState
     node_id: str
     remote_managers: List[ManagerInfo]
@@ -47,24 +57,84 @@ class NodeState(Enum):
     DISCONNECTED = 'disconnected'
 
 
+@unique
+class NodeAvailability(Enum):
+    ACTIVE = 'active'
+    PAUSE = 'pause'
+    DRAIN = 'drain'
+
+
 @dataclass(frozen=True)
 class NodeInfo:
+    __slots__ = (
+        'node_id', 'hostname', 'status', 'availability', 'address', 'labels',
+        'is_manager', 'manager_address', 'manager_is_leader'
+    )
+
     node_id: str
+    hostname: str
     status: NodeState
+    availability: NodeAvailability
     address: str
+    labels: Dict[str, str]
     is_manager: bool
     manager_address: Optional[str]
     manager_is_leader: Optional[bool]
 
 
+@dataclass(frozen=True)
+class ServiceInfo:
+    __slots__ = (
+        'service_id', 'name', 'image', 'labels', 'mode', 'replicas', 'last_active_at', 'update_state',
+        'constraints', 'spread_labels', 'max_replicas_per_node', 'platforms', 'task_states', 'running_node_ids'
+    )
+
+    service_id: str
+    name: str
+    image: Optional[str]
+    labels: Dict[str, str]
+    mode: str
+    replicas: Optional[int]
+    last_active_at: datetime
+    update_state: Optional[str]
+    constraints: List[str]
+    spread_labels: List[str]
+    max_replicas_per_node: int
+    platforms: List[str]
+    task_states: List[str]
+    running_node_ids: List[str]
+
+
+@dataclass(frozen=True)
+class DiskUsage:
+    __slots__ = (
+        'images', 'images_size', 'containers', 'containers_size', 'volumes', 'volumes_size',
+        'build_cache_size', 'layers_size'
+    )
+
+    images: int
+    images_size: int
+    containers: int
+    containers_size: int
+    volumes: int
+    volumes_size: int
+    build_cache_size: int
+    layers_size: int
+
+
 @dataclass(frozen=True)
 class JoinTokens:
+    __slots__ = ('manager', 'worker')
+
     manager: str
     worker: str
 
 
 class JanitorDockerClient:
-    client: DockerClient = docker.from_env()
+    client: DockerClient
+
+    def __init__(self):
+        self.client = docker.from_env()
 
     def node_info(self, node_id: str) -> NodeInfo:
         return _as_node_info(self.client.nodes.get(node_id).attrs)
@@ -109,25 +179,45 @@ class JanitorDockerClient:
         tokens = self.client.swarm.attrs['JoinTokens']
         return JoinTokens(tokens['Manager'], tokens['Worker'])
 
-    def prune_containers(self):
+    def prune_containers(self) -> int:
         logging.info('Pruning containers ...')
         containers = self.client.containers.prune()
-        logging.info(containers)
+        return _log_prune_result('containers', containers, 'ContainersDeleted')
 
-    def prune_images(self):
+    def prune_images(self) -> int:
         logging.info('Pruning images ...')
         images = self.client.images.prune(filters={'dangling': False})
-        logging.info(images)
+        # ImagesDeleted also lists every untagged reference, only the entries with a "Deleted" key are removed images.
+        return _log_prune_result('images', images, 'ImagesDeleted', lambda entry: 'Deleted' in entry)
 
-    def prune_networks(self):
+    def prune_networks(self) -> int:
         logging.info('Pruning networks ...')
         networks = self.client.networks.prune()
-        logging.info(networks)
+        return _log_prune_result('networks', networks, 'NetworksDeleted')
 
-    def prune_volumes(self):
+    def prune_volumes(self) -> int:
         logging.info('Pruning volumes ...')
         volumes = self.client.volumes.prune()
-        logging.info(volumes)
+        return _log_prune_result('volumes', volumes, 'VolumesDeleted')
+
+    def disk_usage(self) -> DiskUsage:
+        df_dict: Dict = self.client.df()
+
+        images: List[Dict] = df_dict.get('Images') or []
+        containers: List[Dict] = df_dict.get('Containers') or []
+        volumes: List[Dict] = df_dict.get('Volumes') or []
+        build_cache: List[Dict] = df_dict.get('BuildCache') or []
+
+        return DiskUsage(
+            images=len(images),
+            images_size=sum(image.get('Size', 0) for image in images),
+            containers=len(containers),
+            containers_size=sum(container.get('SizeRw', 0) for container in containers),
+            volumes=len(volumes),
+            volumes_size=sum(max(volume.get('UsageData', {}).get('Size', 0), 0) for volume in volumes),
+            build_cache_size=sum(cache.get('Size', 0) for cache in build_cache),
+            layers_size=df_dict.get('LayersSize', 0)
+        )
 
     def refresh_login(self, login_data: LoginData):
         logging.info('Logging in to the Docker registry "%s" ...', login_data.registry)
@@ -141,15 +231,26 @@ class JanitorDockerClient:
 
         logging.info('Status: %s', login_status['Status'])
 
-    # noinspection PyProtectedMember
     def update_service(self, service: Service) -> Dict:
+        return self._update_service_spec(service, service.attrs['Spec'])
+
+    def force_update_service(self, service_id: str) -> Dict:
+        service: Service = self.client.services.get(service_id)
+        service_spec: Dict = service.attrs['Spec']
+
+        task_template: Dict = service_spec['TaskTemplate']
+        task_template['ForceUpdate'] = task_template.get('ForceUpdate', 0) + 1
+
+        return self._update_service_spec(service, service_spec)
+
+    # noinspection PyProtectedMember
+    def _update_service_spec(self, service: Service, service_spec: Dict) -> Dict:
         api_client = self.client.api
 
         url = api_client._url('/services/{0}/update', service.id)
         params = {'version': service.version}
         headers = {}
 
-        service_spec = service.attrs['Spec']
         container_spec = service_spec['TaskTemplate'].get('ContainerSpec', {})
         image = container_spec.get('Image', None)
         if image is not None:
@@ -158,7 +259,7 @@ class JanitorDockerClient:
             if auth_header is not None:
                 headers['X-Registry-Auth'] = auth_header
 
-        logging.debug('Updating the service: url=%s, data=%s, headers=%s', url, service_spec, headers)
+        logging.debug('Updating the service: url=%s, data=%s, headers=%s', url, service_spec, list(headers))
         response = api_client._post_json(url=url, data=service_spec, params=params, headers=headers)
         return api_client._result(response, json=True)
 
@@ -168,6 +269,36 @@ class JanitorDockerClient:
             update_status = self.update_service(service)
             logging.info('Warnings: %s', update_status['Warnings'])
 
+    def list_services(self) -> List[ServiceInfo]:
+        task_states: Dict[str, List[str]] = defaultdict(list)
+        running_node_ids: Dict[str, List[str]] = defaultdict(list)
+        last_task_at: Dict[str, datetime] = {}
+        for task_dict in self.client.api.tasks():
+            service_id = task_dict['ServiceID']
+            task_state = task_dict['Status']['State']
+            task_states[service_id].append(task_state)
+            if task_state == 'running' and 'NodeID' in task_dict:
+                running_node_ids[service_id].append(task_dict['NodeID'])
+
+            task_at = parse_docker_timestamp(task_dict['Status']['Timestamp'])
+            last_task_at[service_id] = max(task_at, last_task_at.get(service_id, task_at))
+
+        return [
+            _as_service_info(
+                service_dict,
+                task_states[service_dict['ID']],
+                running_node_ids[service_dict['ID']],
+                last_task_at.get(service_dict['ID'], None)
+            )
+            for service_dict in self.client.api.services()
+        ]
+
+    def remove_service(self, service_id: str):
+        self.client.api.remove_service(service_id)
+
+    def close_connections(self):
+        self.client.api.close()
+
     def join_swarm(self, address: str, join_token: str):
         self.client.swarm.join(remote_addrs=[address], join_token=join_token)
 
@@ -175,6 +306,21 @@ class JanitorDockerClient:
         self.client.api.leave_swarm(force=True)
 
 
+def _log_prune_result(
+        kind: str,
+        result: Dict,
+        deleted_key: str,
+        is_counted: Callable[[Any], bool] = lambda entry: True
+) -> int:
+    deleted: List = result.get(deleted_key) or []
+    space_reclaimed: int = result.get('SpaceReclaimed') or 0
+    deleted_count = sum(1 for entry in deleted if is_counted(entry))
+
+    logging.info('Pruned %d %s, reclaimed %d bytes.', deleted_count, kind, space_reclaimed)
+    logging.debug('Pruned %s: %s', kind, deleted)
+    return space_reclaimed
+
+
 def _as_node_info(node_dict: Dict) -> NodeInfo:
     opt_manager_status: Optional[Dict] = node_dict.get('ManagerStatus', None)
 
@@ -185,9 +331,54 @@ def _as_node_info(node_dict: Dict) -> NodeInfo:
 
     return NodeInfo(
         node_id=node_dict['ID'],
+        hostname=node_dict['Description']['Hostname'],
         status=NodeState(node_dict['Status']['State']),
+        availability=NodeAvailability(node_dict['Spec']['Availability']),
         address=node_dict['Status']['Addr'],
+        labels=node_dict['Spec'].get('Labels') or {},
         is_manager=is_manager,
         manager_address=manager_address,
         manager_is_leader=manager_is_leader
     )
+
+
+def _as_service_info(
+        service_dict: Dict,
+        task_states: List[str],
+        running_node_ids: List[str],
+        last_task_at: Optional[datetime]
+) -> ServiceInfo:
+    spec: Dict = service_dict['Spec']
+    mode_dict: Dict = spec.get('Mode', {})
+    placement: Dict = spec['TaskTemplate'].get('Placement', {})
+    update_status: Dict = service_dict.get('UpdateStatus', {})
+
+    # UpdatedAt changes whenever the spec is pushed again (e.g. by refresh_auth), so it says nothing about activity.
+    created_at = parse_docker_timestamp(service_dict['CreatedAt'])
+    last_active_at = created_at if last_task_at is None else max(created_at, last_task_at)
+
+    mode = next(iter(mode_dict), 'Replicated')
+    replicas = mode_dict['Replicated'].get('Replicas', 1) if mode == 'Replicated' else None
+
+    return ServiceInfo(
+        service_id=service_dict['ID'],
+        name=spec['Name'],
+        image=spec['TaskTemplate'].get('ContainerSpec', {}).get('Image', None),
+        labels=spec.get('Labels') or {},
+        mode=mode,
+        replicas=replicas,
+        last_active_at=last_active_at,
+        update_state=update_status.get('State', None),
+        constraints=placement.get('Constraints') or [],
+        spread_labels=[
+            preference['Spread']['SpreadDescriptor']
+            for preference in placement.get('Preferences') or [] if 'Spread' in preference
+        ],
+        max_replicas_per_node=placement.get('MaxReplicas', 0),
+        platforms=[
+            '%s/%s' % (platform.get('OS', ''), platform.get('Architecture', ''))
+            for platform in placement.get('Platforms') or []
+        ],
+        task_states=task_states,
+        running_node_ids=running_node_ids
+    )
@@ -0,0 +1,201 @@
+import dataclasses
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import swarmjanitor.version
+from swarmjanitor.config import JanitorConfig
+from swarmjanitor.core import InventoryUnavailableError, JanitorCore, JanitorError, PruneSummary
+from swarmjanitor.dockerclient import DiskUsage, NodeAvailability, NodeInfo, NodeState
+from swarmjanitor.scheduler import JanitorScheduler, JobInfo
+from swarmjanitor.shutdown import Stoppable
+
+
+@dataclass(frozen=True)
+class NodeReport:
+    __slots__ = (
+        'node_id', 'availability_zone', 'is_manager', 'is_leader', 'version', 'disk_usage', 'last_prune', 'jobs'
+    )
+
+    node_id: str
+    availability_zone: str
+    is_manager: bool
+    is_leader: bool
+    version: str
+    disk_usage: Optional[DiskUsage]
+    last_prune: Optional[PruneSummary]
+    jobs: List[JobInfo]
+
+
+@dataclass(frozen=True)
+class NodeInventory:
+    __slots__ = ('node_id', 'hostname', 'address', 'status', 'availability', 'is_manager', 'report', 'error')
+
+    node_id: str
+    hostname: str
+    address: str
+    status: NodeState
+    availability: NodeAvailability
+    is_manager: bool
+    report: Optional[NodeReport]
+    error: Optional[str]
+
+
+@dataclass(frozen=True)
+class ClusterInventory:
+    __slots__ = ('generated_at', 'duration', 'reachable_nodes', 'disk_usage', 'space_reclaimed', 'nodes')
+
+    generated_at: str
+    duration: float
+    reachable_nodes: int
+    disk_usage: DiskUsage
+    space_reclaimed: int
+    nodes: List[NodeInventory]
+
+
+class JanitorInventory(Stoppable):
+    config: JanitorConfig
+    core: JanitorCore
+    scheduler: JanitorScheduler
+    thread: threading.Thread
+
+    _inventory: Optional[ClusterInventory] = None
+    _disk_usage: Optional[DiskUsage] = None
+    _stop_event: threading.Event
+
+    def __init__(self, config: JanitorConfig, core: JanitorCore, scheduler: JanitorScheduler):
+        self.config = config
+        self.core = core
+        self.scheduler = scheduler
+        self.thread = threading.Thread(target=self._run, name='inventory', daemon=True)
+
+        self._stop_event = threading.Event()
+
+    def node_report(self) -> NodeReport:
+        return NodeReport(
+            node_id=self.core.docker_client.swarm_info().node_id,
+            availability_zone=self.config.availability_zone,
+            is_manager=self.core.is_manager(),
+            is_leader=self.core.is_leader(),
+            version=swarmjanitor.version.VERSION,
+            disk_usage=self._disk_usage,
+            last_prune=self.core.last_prune,
+            jobs=self.scheduler.list_jobs()
+        )
+
+    def _fetch_node(self, node: NodeInfo) -> NodeInventory:
+        report: Optional[NodeReport] = None
+        error: Optional[str] = None
+
+        try:
+            report = _as_node_report(self.core.peer_client.get_json(node.address, '/node'))
+        except Exception as exception:
+            error = str(exception)
+
+        return NodeInventory(
+            node_id=node.node_id,
+            hostname=node.hostname,
+            address=node.address,
+            status=node.status,
+            availability=node.availability,
+            is_manager=node.is_manager,
+            report=report,
+            error=error
+        )
+
+    def refresh_disk_usage(self):
+        self._disk_usage = self.core.docker_client.disk_usage()
+
+    def refresh(self):
+        try:
+            nodes = self.core.leader_nodes()
+        except JanitorError as error:
+            logging.debug('Skipped collecting the cluster inventory: %s', error.message)
+            self._inventory = None
+            return
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(self.config.inventory_concurrency, thread_name_prefix='inventory') as executor:
+            node_inventories = list(executor.map(self._fetch_node, nodes))
+
+        reports = [node.report for node in node_inventories if node.report is not None]
+        disk_usages = [report.disk_usage for report in reports if report.disk_usage is not None]
+        self._inventory = ClusterInventory(
+            generated_at=datetime.now(timezone.utc).isoformat(),
+            duration=round(time.monotonic() - start, 3),
+            reachable_nodes=len(reports),
+            disk_usage=DiskUsage(*[
+                sum(getattr(disk_usage, field.name) for disk_usage in disk_usages)
+                for field in dataclasses.fields(DiskUsage)
+            ]),
+            space_reclaimed=sum(report.last_prune.space_reclaimed for report in reports if report.last_prune),
+            nodes=node_inventories
+        )
+        logging.info('Collected the cluster inventory from %d of %d nodes.', len(reports), len(nodes))
+
+    def cluster_inventory(self) -> ClusterInventory:
+        inventory = self._inventory
+        if inventory is None:
+            raise InventoryUnavailableError
+
+        return inventory
+
+    def drop_cache(self):
+        self._inventory = None
+
+    def _run(self):
+        while True:
+            if self.scheduler.watchdog.allows_heavy_jobs():
+                try:
+                    self.refresh_disk_usage()
+                except:
+                    logging.warning('Failed to determine the disk usage.', exc_info=True)
+
+                try:
+                    self.refresh()
+                except:
+                    logging.warning('Failed to collect the cluster inventory.', exc_info=True)
+
+            if self._stop_event.wait(self.config.interval_inventory):
+                return
+
+    def _start_daemon(self):
+        self.thread.start()
+
+    def stop(self, signum, frame):
+        self._stop_event.set()
+        logging.info('Stopped inventory collection.')
+
+    @classmethod
+    def start(cls, config: JanitorConfig, core: JanitorCore, scheduler: JanitorScheduler):
+        inventory = cls(config, core, scheduler)
+        if config.inventory:
+            inventory._start_daemon()
+        return inventory
+
+
+def _as_node_report(report_dict: Dict) -> NodeReport:
+    # Peers may run another janitor version during a rolling upgrade, so unknown keys are ignored
+    # and missing keys fall back to empty values.
+    opt_disk_usage: Optional[Dict] = report_dict.get('disk_usage', None)
+    opt_last_prune: Optional[Dict] = report_dict.get('last_prune', None)
+
+    return NodeReport(
+        node_id=report_dict.get('node_id', ''),
+        availability_zone=report_dict.get('availability_zone', ''),
+        is_manager=report_dict.get('is_manager', False),
+        is_leader=report_dict.get('is_leader', False),
+        version=report_dict.get('version', ''),
+        disk_usage=None if opt_disk_usage is None else DiskUsage(*[
+            opt_disk_usage.get(field.name, 0) for field in dataclasses.fields(DiskUsage)
+        ]),
+        last_prune=None if opt_last_prune is None else PruneSummary(
+            finished_at=opt_last_prune.get('finished_at', ''),
+            space_reclaimed=opt_last_prune.get('space_reclaimed', 0)
+        ),
+        jobs=report_dict.get('jobs', [])
+    )
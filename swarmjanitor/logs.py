@@ -0,0 +1,73 @@
+import json
+import logging
+import queue
+from enum import Enum, unique
+from logging.handlers import QueueHandler, QueueListener
+
+TEXT_FORMAT = '%(asctime)s %(levelname)-8.8s [%(threadName)10.10s] %(message)s'
+QUEUE_SIZE = 10000
+
+
+@unique
+class LogFormat(Enum):
+    TEXT = 'text'
+    JSON = 'json'
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'thread': record.threadName,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+
+        return json.dumps(entry)
+
+
+class DroppingQueueHandler(QueueHandler):
+    dropped_records: int = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge the arguments and render the traceback here, the actual formatting happens on the listener thread.
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped_records += 1
+
+
+def start_logging(level: str, log_format: LogFormat) -> QueueListener:
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter() if log_format == LogFormat.JSON else logging.Formatter(TEXT_FORMAT))
+
+    record_queue = queue.Queue(QUEUE_SIZE)
+    logging.basicConfig(level=level, handlers=[DroppingQueueHandler(record_queue)])
+
+    listener = QueueListener(record_queue, stream_handler)
+    listener.start()
+    return listener
+
+
+def dropped_log_records() -> int:
+    return sum(
+        handler.dropped_records for handler in logging.getLogger().handlers
+        if isinstance(handler, DroppingQueueHandler)
+    )
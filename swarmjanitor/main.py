@@ -8,6 +8,10 @@ from swarmjanitor.awsclient import JanitorAwsClient
 from swarmjanitor.config import JanitorConfig
 from swarmjanitor.core import JanitorCore
 from swarmjanitor.dockerclient import JanitorDockerClient
+from swarmjanitor.inventory import JanitorInventory
+from swarmjanitor.logs import LogFormat, start_logging
+from swarmjanitor.memory import MemoryWatchdog
+from swarmjanitor.peerclient import JanitorPeerClient
 from swarmjanitor.scheduler import JanitorScheduler
 from swarmjanitor.server import JanitorServer
 from swarmjanitor.shutdown import ShutdownHandler
@@ -25,7 +29,8 @@ def run():
     parser.parse_args()
 
     logging_level = os.getenv('SWARM_LOG_LEVEL', 'INFO')
-    logging.basicConfig(format='%(asctime)s %(levelname)-8.8s [%(threadName)10.10s] %(message)s', level=logging_level)
+    logging_format = LogFormat(os.getenv('SWARM_LOG_FORMAT', 'text'))
+    log_listener = start_logging(logging_level, logging_format)
 
     config = JanitorConfig.from_env()
     config_json = json.dumps(config, indent=2, cls=SmartEncoder)
@@ -33,11 +38,19 @@ def run():
 
     aws_client = JanitorAwsClient()
     docker_client = JanitorDockerClient()
-    core = JanitorCore(config, aws_client, docker_client)
-    scheduler = JanitorScheduler(config, core)
-    server = JanitorServer.start(core, scheduler)
+    peer_client = JanitorPeerClient(config)
+    core = JanitorCore(config, aws_client, docker_client, peer_client)
+    watchdog = MemoryWatchdog.start(config)
+    scheduler = JanitorScheduler(config, core, watchdog)
+    inventory = JanitorInventory.start(config, core, scheduler)
+    server = JanitorServer.start(core, scheduler, inventory)
 
-    shutdown_handler = ShutdownHandler([server, scheduler])
+    watchdog.register_shedder('docker_connections', docker_client.close_connections)
+    watchdog.register_shedder('peer_connections', peer_client.close_connections)
+    watchdog.register_shedder('heap_tracing', server.diagnostics.heap_stop)
+    watchdog.register_shedder('inventory', inventory.drop_cache)
+
+    shutdown_handler = ShutdownHandler([server, scheduler, watchdog, inventory])
 
     logging.info('Starting scheduler loop ...')
     while not shutdown_handler.stop_now:
@@ -45,4 +58,5 @@ def run():
         scheduler.tick()
 
     logging.info('Stopped scheduler loop.')
+    log_listener.stop()
     logging.shutdown()
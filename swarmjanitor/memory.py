@@ -0,0 +1,184 @@
+import gc
+import logging
+import os
+import resource
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum, unique
+from typing import Callable, Dict, List, Optional
+
+from swarmjanitor.config import JanitorConfig
+from swarmjanitor.shutdown import Stoppable
+
+CGROUP_LIMIT_FILES = ['/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes']
+UNLIMITED_BYTES = 2 ** 60
+SHED_REPEAT_SECONDS = 60
+
+
+@unique
+class MemoryPressure(Enum):
+    NORMAL = 'normal'
+    SOFT = 'soft'
+    HARD = 'hard'
+
+
+@dataclass(frozen=True)
+class MemoryInfo:
+    __slots__ = (
+        'rss', 'limit', 'headroom', 'pressure', 'gc_counts', 'gc_collections', 'shed_count', 'deferred_jobs',
+        'deferred_seconds'
+    )
+
+    rss: int
+    limit: Optional[int]
+    headroom: Optional[int]
+    pressure: MemoryPressure
+    gc_counts: List[int]
+    gc_collections: List[int]
+    shed_count: int
+    deferred_jobs: int
+    deferred_seconds: Dict[str, int]
+
+
+class MemoryWatchdog(Stoppable):
+    config: JanitorConfig
+    limit: Optional[int]
+    thread: threading.Thread
+
+    pressure: MemoryPressure = MemoryPressure.NORMAL
+    shed_count: int = 0
+    deferred_jobs: int = 0
+
+    _shedders: Dict[str, Callable[[], None]]
+    _deferred_since: Dict[str, float]
+    _last_shed: float = 0.0
+    _stop_event: threading.Event
+
+    def __init__(self, config: JanitorConfig):
+        self.config = config
+        self.limit = config.memory_limit if config.memory_limit > 0 else _read_cgroup_limit()
+        self.thread = threading.Thread(target=self._run, name='watchdog', daemon=True)
+
+        self._shedders = {}
+        self._deferred_since = {}
+        self._stop_event = threading.Event()
+
+    def register_shedder(self, name: str, shedder: Callable[[], None]):
+        self._shedders[name] = shedder
+
+    def _pressure(self, rss: int) -> MemoryPressure:
+        if self.limit is None:
+            return MemoryPressure.NORMAL
+        if rss >= self.limit * self.config.memory_hard_threshold:
+            return MemoryPressure.HARD
+        if rss >= self.limit * self.config.memory_soft_threshold:
+            return MemoryPressure.SOFT
+        return MemoryPressure.NORMAL
+
+    def _shed(self):
+        for name, shedder in self._shedders.items():
+            try:
+                shedder()
+            except:
+                logging.warning('Failed to shed memory via %s.', name, exc_info=True)
+
+        gc.collect()
+        self.shed_count += 1
+        self._last_shed = time.monotonic()
+
+    def check(self) -> MemoryPressure:
+        rss = _read_rss()
+        pressure = self._pressure(rss)
+
+        rising = _PRESSURE_ORDER[pressure] > _PRESSURE_ORDER[self.pressure]
+        repeating = pressure != MemoryPressure.NORMAL and time.monotonic() - self._last_shed > SHED_REPEAT_SECONDS
+
+        if pressure != self.pressure:
+            logging.info('Memory pressure changed to %s (rss=%d, limit=%s).', pressure.value, rss, self.limit)
+        self.pressure = pressure
+
+        if rising or repeating:
+            self._shed()
+            self.pressure = self._pressure(_read_rss())
+
+        return self.pressure
+
+    def allows_heavy_jobs(self) -> bool:
+        return self.pressure != MemoryPressure.HARD
+
+    def defer_job(self, job_name: str):
+        self.deferred_jobs += 1
+        self._deferred_since.setdefault(job_name, time.monotonic())
+        logging.warning('Deferred the job %s due to high memory usage.', job_name)
+
+    def resume_job(self, job_name: str):
+        self._deferred_since.pop(job_name, None)
+
+    def is_deferred(self, job_name: str) -> bool:
+        return job_name in self._deferred_since
+
+    def memory_info(self) -> MemoryInfo:
+        rss = _read_rss()
+        now = time.monotonic()
+        return MemoryInfo(
+            rss=rss,
+            limit=self.limit,
+            headroom=None if self.limit is None else self.limit - rss,
+            pressure=self.pressure,
+            gc_counts=list(gc.get_count()),
+            gc_collections=[generation['collections'] for generation in gc.get_stats()],
+            shed_count=self.shed_count,
+            deferred_jobs=self.deferred_jobs,
+            deferred_seconds={
+                job_name: int(now - deferred_since) for job_name, deferred_since in self._deferred_since.copy().items()
+            }
+        )
+
+    def _run(self):
+        logging.info('Starting memory watchdog (limit=%s) ...', self.limit)
+        while not self._stop_event.wait(self.config.interval_memory_check):
+            try:
+                self.check()
+            except:
+                logging.warning('Memory check failed.', exc_info=True)
+
+    def _start_daemon(self):
+        self.thread.start()
+
+    def stop(self, signum, frame):
+        self._stop_event.set()
+        logging.info('Stopped memory watchdog.')
+
+    @classmethod
+    def start(cls, config: JanitorConfig):
+        watchdog = cls(config)
+        watchdog._start_daemon()
+        return watchdog
+
+
+_PRESSURE_ORDER = {MemoryPressure.NORMAL: 0, MemoryPressure.SOFT: 1, MemoryPressure.HARD: 2}
+
+
+def _read_rss() -> int:
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # Peak instead of current usage, but better than nothing on systems without procfs.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _read_cgroup_limit() -> Optional[int]:
+    for path in CGROUP_LIMIT_FILES:
+        try:
+            with open(path) as limit_file:
+                value = limit_file.read().strip()
+        except OSError:
+            continue
+
+        if value == 'max' or int(value) >= UNLIMITED_BYTES:
+            return None
+        return int(value)
+
+    return None
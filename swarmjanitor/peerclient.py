@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum, unique
+from typing import Dict, List, Optional
+
+import requests
+
+from swarmjanitor.config import JanitorConfig
+
+
+@unique
+class BreakerState(Enum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+@dataclass(frozen=True)
+class BreakerInfo:
+    __slots__ = ('address', 'state', 'failures', 'retry_in', 'last_error')
+
+    address: str
+    state: BreakerState
+    failures: int
+    retry_in: Optional[int]
+    last_error: Optional[str]
+
+
+class PeerUnavailableError(RuntimeError):
+    address: str
+
+    def __init__(self, address: str):
+        super().__init__('The circuit breaker for %s is open.' % address)
+        self.address = address
+
+
+class CircuitBreaker:
+    address: str
+    failures: int = 0
+    failed_at: float = 0.0
+    open_until: float = 0.0
+    probing: bool = False
+    last_error: Optional[str] = None
+
+    def __init__(self, address: str):
+        self.address = address
+
+    def state(self, threshold: int, now: float) -> BreakerState:
+        if self.failures < threshold:
+            return BreakerState.CLOSED
+        if now < self.open_until:
+            return BreakerState.OPEN
+        return BreakerState.HALF_OPEN
+
+    def is_idle(self, idle_seconds: int, now: float) -> bool:
+        return not self.probing and now - max(self.failed_at, self.open_until) > idle_seconds
+
+
+class JanitorPeerClient:
+    port: int = 2380
+    timeout_seconds: float = 2.0
+    config: JanitorConfig
+
+    _breakers: Dict[str, CircuitBreaker]
+    _lock: threading.Lock
+    _session: requests.Session
+
+    def __init__(self, config: JanitorConfig):
+        self.config = config
+
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+
+    def _acquire(self, address: str):
+        with self._lock:
+            breaker = self._breakers.get(address)
+            if breaker is None:
+                return
+
+            state = breaker.state(self.config.peer_failure_threshold, time.monotonic())
+            if state == BreakerState.OPEN or (state == BreakerState.HALF_OPEN and breaker.probing):
+                raise PeerUnavailableError(address)
+
+            breaker.probing = state == BreakerState.HALF_OPEN
+
+    def _record_success(self, address: str):
+        with self._lock:
+            self._breakers.pop(address, None)
+
+    def _evict_idle_breakers(self, now: float):
+        # Peers which are not contacted anymore (e.g. terminated nodes) would otherwise be kept forever.
+        for address, breaker in list(self._breakers.items()):
+            if breaker.is_idle(self.config.peer_backoff_max, now):
+                del self._breakers[address]
+
+    def _record_failure(self, address: str, error: Exception):
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle_breakers(now)
+
+            breaker = self._breakers.setdefault(address, CircuitBreaker(address))
+            breaker.failures += 1
+            breaker.failed_at = now
+            breaker.probing = False
+            breaker.last_error = type(error).__name__
+
+            exponent = breaker.failures - self.config.peer_failure_threshold
+            if exponent >= 0:
+                backoff = min(self.config.peer_backoff_initial * 2 ** exponent, self.config.peer_backoff_max)
+                breaker.open_until = now + backoff
+                logging.info('Opened the circuit breaker for %s for %d seconds.', address, backoff)
+
+    def get_json(self, address: str, path: str) -> Dict:
+        self._acquire(address)
+
+        url = 'http://%s:%d%s' % (address, self.port, path)
+        try:
+            response = self._session.get(url, timeout=self.timeout_seconds)
+            logging.info('GET "%s" %s', url, response.status_code)
+        except Exception as error:
+            # Any error counts, otherwise a failed half-open request would leave the breaker probing forever.
+            self._record_failure(address, error)
+            raise
+
+        if response.status_code >= 500:
+            error = requests.HTTPError('%s Server Error for url: %s' % (response.status_code, url), response=response)
+            self._record_failure(address, error)
+            raise error
+
+        self._record_success(address)
+        response.raise_for_status()
+        return response.json()
+
+    def close_connections(self):
+        self._session.close()
+
+    def list_breakers(self) -> List[BreakerInfo]:
+        now = time.monotonic()
+        threshold = self.config.peer_failure_threshold
+
+        with self._lock:
+            self._evict_idle_breakers(now)
+            return [
+                BreakerInfo(
+                    address=breaker.address,
+                    state=breaker.state(threshold, now),
+                    failures=breaker.failures,
+                    retry_in=max(int(breaker.open_until - now), 0) if breaker.failures >= threshold else None,
+                    last_error=breaker.last_error
+                )
+                for breaker in self._breakers.values()
+            ]
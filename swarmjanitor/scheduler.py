@@ -2,14 +2,18 @@ import functools
 import logging
 import time
 from dataclasses import dataclass
-from typing import Any, List, Optional
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
 
 from schedule import CancelJob, Job, Scheduler
 
 from swarmjanitor.config import JanitorConfig
 from swarmjanitor.core import JanitorCore
+from swarmjanitor.memory import MemoryWatchdog
 from swarmjanitor.shutdown import Stoppable
 
+DEFERRED_RETRY_SECONDS = 30
+
 
 def scheduled(catch_exceptions: bool = True, cancel_on_failure: bool = False):
     def scheduled_decorator(job_func):
@@ -32,8 +36,55 @@ def scheduled(catch_exceptions: bool = True, cancel_on_failure: bool = False):
     return scheduled_decorator
 
 
+@dataclass(frozen=True)
+class JobResult:
+    __slots__ = ('status', 'duration')
+
+    status: str
+    duration: float
+
+
+def recorded(job_results: Dict[str, JobResult]):
+    def recorded_decorator(job_func):
+        @functools.wraps(job_func)
+        def wrapper(*args, **kwargs):
+            start = time.monotonic()
+            status = 'failed'
+            try:
+                result = job_func(*args, **kwargs)
+                status = 'succeeded'
+                return result
+            finally:
+                job_results[job_func.__name__] = JobResult(status=status, duration=time.monotonic() - start)
+
+        return wrapper
+
+    return recorded_decorator
+
+
+def deferrable(watchdog: MemoryWatchdog):
+    def deferrable_decorator(job_func):
+        @functools.wraps(job_func)
+        def wrapper(*args, **kwargs):
+            if not watchdog.allows_heavy_jobs():
+                watchdog.defer_job(job_func.__name__)
+                return None
+
+            watchdog.resume_job(job_func.__name__)
+            return job_func(*args, **kwargs)
+
+        return wrapper
+
+    return deferrable_decorator
+
+
 @dataclass(frozen=True)
 class JobInfo:
+    __slots__ = (
+        'name', 'interval', 'latest', 'unit', 'at_time', 'last_run', 'next_run', 'period', 'start_day',
+        'last_status', 'last_duration'
+    )
+
     name: str
     interval: Optional[int]
     latest: Optional[str]
@@ -43,9 +94,11 @@ class JobInfo:
     next_run: Optional[str]
     period: Optional[str]
     start_day: Optional[str]
+    last_status: Optional[str]
+    last_duration: Optional[float]
 
 
-def _as_job_info(job: Job) -> JobInfo:
+def _as_job_info(job: Job, opt_job_result: Optional[JobResult]) -> JobInfo:
     def _int_or_none(value: Any) -> Optional[int]:
         return None if value is None else int(value)
 
@@ -62,35 +115,62 @@ def _as_job_info(job: Job) -> JobInfo:
         next_run=_str_or_none(job.next_run),
         period=_str_or_none(job.period),
         start_day=_str_or_none(job.start_day),
+        last_status=None if opt_job_result is None else opt_job_result.status,
+        last_duration=None if opt_job_result is None else round(opt_job_result.duration, 3)
     )
 
 
 class JanitorScheduler(Scheduler, Stoppable):
     tick_seconds: int = 1
+    job_count: int
     config: JanitorConfig
     core: JanitorCore
+    watchdog: MemoryWatchdog
+
+    _job_results: Dict[str, JobResult]
 
-    def __init__(self, config: JanitorConfig, core: JanitorCore):
+    def __init__(self, config: JanitorConfig, core: JanitorCore, watchdog: MemoryWatchdog):
         super().__init__()
 
         self.config = config
         self.core = core
+        self.watchdog = watchdog
+
+        self._job_results = {}
 
         self._schedule_jobs()
+        self.job_count = len(self.jobs)
 
     def _schedule_jobs(self):
-        self.every(self.config.interval_assume_role).seconds.do(scheduled()(self.core.assume_desired_role))
-        self.every(self.config.interval_label_az).seconds.do(scheduled()(self.core.label_nodes_az_skip))
-        self.every(self.config.interval_prune_nodes).seconds.do(scheduled()(self.core.prune_nodes_skip))
-        self.every(self.config.interval_prune_system).seconds.do(scheduled()(self.core.prune_system))
-        self.every(self.config.interval_refresh_auth).seconds.do(scheduled()(self.core.refresh_auth_skip))
+        self.every(self.config.interval_assume_role).seconds.do(self._light(self.core.assume_desired_role))
+        self.every(self.config.interval_label_az).seconds.do(self._light(self.core.label_nodes_az_skip))
+        self.every(self.config.interval_prune_nodes).seconds.do(self._light(self.core.prune_nodes_skip))
+        self.every(self.config.interval_prune_system).seconds.do(self._heavy(self.core.prune_system))
+        self.every(self.config.interval_refresh_auth).seconds.do(self._heavy(self.core.refresh_auth_skip))
+        self.every(self.config.interval_prune_services).seconds.do(self._heavy(self.core.prune_services_skip))
+        self.every(self.config.interval_rebalance_services).seconds.do(self._heavy(self.core.rebalance_services_skip))
+
+    def _light(self, job_func):
+        return scheduled()(recorded(self._job_results)(job_func))
+
+    def _heavy(self, job_func):
+        return scheduled()(deferrable(self.watchdog)(recorded(self._job_results)(job_func)))
+
+    def run_pending(self):
+        super().run_pending()
+
+        # A deferred job would otherwise wait for its whole interval, so it is retried soon instead.
+        retry_at = datetime.now() + timedelta(seconds=DEFERRED_RETRY_SECONDS)
+        for job in self.jobs:
+            if self.watchdog.is_deferred(job.job_func.__name__) and job.next_run > retry_at:
+                job.next_run = retry_at
 
     def stop(self, signum, frame):
         self.clear()
         logging.info('Cleared all jobs.')
 
     def list_jobs(self) -> List[JobInfo]:
-        return [_as_job_info(job) for job in self.jobs]
+        return [_as_job_info(job, self._job_results.get(job.job_func.__name__, None)) for job in self.jobs]
 
     def tick(self):
         time.sleep(self.tick_seconds)
@@ -2,17 +2,29 @@ import dataclasses
 import functools
 import json
 import logging
+from socketserver import ThreadingMixIn
 from threading import Thread
 from typing import List
+from wsgiref.simple_server import WSGIServer
 
 import bottle
 from bottle import Bottle, HTTPError
 
 from swarmjanitor.core import JanitorCore, JanitorError
+from swarmjanitor.diagnostics import JanitorDiagnostics
+from swarmjanitor.inventory import JanitorInventory
+from swarmjanitor.logs import dropped_log_records
+from swarmjanitor.memory import MemoryInfo, MemoryPressure
 from swarmjanitor.scheduler import JanitorScheduler, JobInfo
 from swarmjanitor.shutdown import Stoppable
 from swarmjanitor.utils import SmartEncoder
 
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1', '::ffff:127.0.0.1')
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
 
 def json_response(error_status: int = 500):
     def json_decorator(request_func):
@@ -28,10 +40,39 @@ def json_response(error_status: int = 500):
     return json_decorator
 
 
+def text_response(request_func):
+    @functools.wraps(request_func)
+    def wrapper(*args, **kwargs):
+        bottle.response.content_type = 'text/plain; charset=UTF-8'
+        return request_func(*args, **kwargs)
+
+    return wrapper
+
+
+def local_only(request_func):
+    @functools.wraps(request_func)
+    def wrapper(*args, **kwargs):
+        if bottle.request.environ.get('REMOTE_ADDR') not in LOOPBACK_ADDRESSES:
+            raise HTTPError(status=403, body='Debug endpoints are only available from the local host.')
+        return request_func(*args, **kwargs)
+
+    return wrapper
+
+
+def _query_int(name: str, default: int) -> int:
+    try:
+        return int(bottle.request.query.get(name, default))
+    except ValueError:
+        raise HTTPError(status=400, body='Query parameter "%s" must be an integer.' % name)
+
+
 @dataclasses.dataclass(frozen=True)
 class HealthInfo:
+    __slots__ = ('status', 'jobs', 'memory')
+
     status: str
     jobs: List[JobInfo]
+    memory: MemoryInfo
 
 
 class JanitorServer(Stoppable):
@@ -39,24 +80,44 @@ class JanitorServer(Stoppable):
     thread: Thread
     core: JanitorCore
     scheduler: JanitorScheduler
+    inventory: JanitorInventory
+    diagnostics: JanitorDiagnostics
 
-    def __init__(self, core: JanitorCore, scheduler: JanitorScheduler):
+    def __init__(self, core: JanitorCore, scheduler: JanitorScheduler, inventory: JanitorInventory):
         self.app = Bottle()
-        self.thread = Thread(target=self._run_server, daemon=True)
+        self.thread = Thread(target=self._run_server, name='server', daemon=True)
 
         self.core = core
         self.scheduler = scheduler
+        self.inventory = inventory
+        self.diagnostics = JanitorDiagnostics()
 
         self._register_routes()
 
     def _register_routes(self):
         self.app.get(path='/health', callback=json_response()(self._health))
-        self.app.get(path='/system', callback=json_response()(self.core.system_info))
+        self.app.get(path='/metrics', callback=text_response(self._metrics))
+        self.app.get(path='/system', callback=json_response()(self._unless_memory_critical(self.core.system_info)))
         self.app.get(path='/join', callback=json_response(400)(self.core.join_info))
+        self.app.get(path='/node', callback=json_response()(self._unless_memory_critical(self.inventory.node_report)))
+        self.app.get(path='/inventory', callback=json_response(503)(self.inventory.cluster_inventory))
+        self.app.get(path='/services/prune', callback=json_response(400)(self.core.prune_services_report))
+        self.app.get(path='/peers', callback=json_response()(self.core.peer_client.list_breakers))
+
+        if self.core.config.debug_endpoints:
+            self._register_debug_routes()
+
+    def _register_debug_routes(self):
+        logging.info('Enabling debug endpoints for local requests ...')
+        self.app.get(path='/debug/threads', callback=local_only(text_response(self.diagnostics.thread_stacks)))
+        self.app.get(path='/debug/profile', callback=local_only(text_response(self._debug_profile)))
+        self.app.get(path='/debug/heap', callback=local_only(text_response(self._debug_heap)))
+        self.app.get(path='/debug/heap/diff', callback=local_only(text_response(self._debug_heap_diff)))
+        self.app.get(path='/debug/heap/stop', callback=local_only(text_response(self.diagnostics.heap_stop)))
 
     def _run_server(self):
         logging.info('Starting server ...')
-        self.app.run(host='0.0.0.0', port=2380)
+        self.app.run(host='0.0.0.0', port=2380, server_class=ThreadingWSGIServer)
 
     def _start_daemon(self):
         self.thread.start()
@@ -66,8 +127,8 @@ class JanitorServer(Stoppable):
         logging.info('Stopped server.')
 
     @classmethod
-    def start(cls, core: JanitorCore, scheduler: JanitorScheduler):
-        janitor_server = cls(core, scheduler)
+    def start(cls, core: JanitorCore, scheduler: JanitorScheduler, inventory: JanitorInventory):
+        janitor_server = cls(core, scheduler, inventory)
         janitor_server._start_daemon()
         return janitor_server
 
@@ -77,12 +138,78 @@ class JanitorServer(Stoppable):
         status_word = 'UP'
         status_code = 200
 
-        if len(jobs) != 5:
+        if len(jobs) != self.scheduler.job_count:
             status_word = 'WARN'
             status_code = 500
 
         bottle.response.status = status_code
         return HealthInfo(
             status=status_word,
-            jobs=jobs
+            jobs=jobs,
+            memory=self.scheduler.watchdog.memory_info()
         )
+
+    def _unless_memory_critical(self, request_func):
+        @functools.wraps(request_func)
+        def wrapper(*args, **kwargs):
+            if not self.scheduler.watchdog.allows_heavy_jobs():
+                raise HTTPError(status=503, body='The memory usage is too high.')
+            return request_func(*args, **kwargs)
+
+        return wrapper
+
+    def _metrics(self) -> str:
+        memory = self.scheduler.watchdog.memory_info()
+        pressure_levels = {MemoryPressure.NORMAL: 0, MemoryPressure.SOFT: 1, MemoryPressure.HARD: 2}
+
+        lines = [
+            '# TYPE swarm_janitor_jobs gauge',
+            'swarm_janitor_jobs %d' % len(self.scheduler.jobs),
+            '# TYPE swarm_janitor_memory_rss_bytes gauge',
+            'swarm_janitor_memory_rss_bytes %d' % memory.rss,
+            '# TYPE swarm_janitor_memory_pressure gauge',
+            'swarm_janitor_memory_pressure %d' % pressure_levels[memory.pressure],
+            '# TYPE swarm_janitor_memory_shed_total counter',
+            'swarm_janitor_memory_shed_total %d' % memory.shed_count,
+            '# TYPE swarm_janitor_jobs_deferred_total counter',
+            'swarm_janitor_jobs_deferred_total %d' % memory.deferred_jobs,
+            '# TYPE swarm_janitor_job_deferred_seconds gauge',
+        ]
+        lines.extend(
+            'swarm_janitor_job_deferred_seconds{job="%s"} %d' % (job_name, seconds)
+            for job_name, seconds in memory.deferred_seconds.items()
+        )
+        lines.extend([
+            '# TYPE swarm_janitor_log_records_dropped_total counter',
+            'swarm_janitor_log_records_dropped_total %d' % dropped_log_records(),
+        ])
+
+        if memory.limit is not None:
+            lines.extend([
+                '# TYPE swarm_janitor_memory_limit_bytes gauge',
+                'swarm_janitor_memory_limit_bytes %d' % memory.limit,
+                '# TYPE swarm_janitor_memory_headroom_bytes gauge',
+                'swarm_janitor_memory_headroom_bytes %d' % memory.headroom,
+            ])
+
+        lines.append('# TYPE swarm_janitor_gc_objects gauge')
+        lines.extend(
+            'swarm_janitor_gc_objects{generation="%d"} %d' % (generation, count)
+            for generation, count in enumerate(memory.gc_counts)
+        )
+        lines.append('# TYPE swarm_janitor_gc_collections_total counter')
+        lines.extend(
+            'swarm_janitor_gc_collections_total{generation="%d"} %d' % (generation, count)
+            for generation, count in enumerate(memory.gc_collections)
+        )
+
+        return '\n'.join(lines) + '\n'
+
+    def _debug_profile(self) -> str:
+        return self.diagnostics.profile(seconds=_query_int('seconds', 10), limit=_query_int('limit', 30))
+
+    def _debug_heap(self) -> str:
+        return self.diagnostics.heap_snapshot(limit=_query_int('limit', 25))
+
+    def _debug_heap_diff(self) -> str:
+        return self.diagnostics.heap_diff(limit=_query_int('limit', 25))
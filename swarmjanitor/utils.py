@@ -2,6 +2,7 @@ import dataclasses
 import functools
 import json
 import operator
+from datetime import datetime, timezone
 from enum import Enum
 from typing import List, TypeVar
 
@@ -9,7 +10,9 @@ from typing import List, TypeVar
 class SmartEncoder(json.JSONEncoder):
     def default(self, o):
         if dataclasses.is_dataclass(o):
-            return dataclasses.asdict(o)
+            # Shallow on purpose: nested dataclasses are passed back to default() while the encoder walks the tree,
+            # which avoids the recursive deep copy of dataclasses.asdict.
+            return {field.name: getattr(o, field.name) for field in dataclasses.fields(o)}
 
         if isinstance(o, Enum):
             return o.value
@@ -22,3 +25,8 @@ T = TypeVar('T')
 
 def flatten_list(list_of_lists: List[List[T]]) -> List[T]:
     return functools.reduce(operator.iconcat, list_of_lists, [])
+
+
+def parse_docker_timestamp(value: str) -> datetime:
+    # Docker reports nanoseconds, which datetime cannot parse, so the fraction of the second is dropped.
+    return datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from swarmjanitor.dockerclient import NodeAvailability, NodeInfo, NodeState, ServiceInfo
+
+
+def node(node_id: str, is_manager: bool = False, **labels) -> NodeInfo:
+    return NodeInfo(
+        node_id=node_id,
+        hostname='host-%s' % node_id,
+        status=NodeState.READY,
+        availability=NodeAvailability.ACTIVE,
+        address='10.0.0.1',
+        labels=labels,
+        is_manager=is_manager,
+        manager_address=None,
+        manager_is_leader=None
+    )
+
+
+def service(
+        name: str = 'web',
+        image: Optional[str] = 'registry.example.com/web:1.0',
+        labels: Optional[Dict[str, str]] = None,
+        mode: str = 'Replicated',
+        replicas: Optional[int] = 1,
+        task_states: Optional[List[str]] = None,
+        running_node_ids: Optional[List[str]] = None,
+        constraints: Optional[List[str]] = None,
+        spread_labels: Optional[List[str]] = None,
+        max_replicas_per_node: int = 0,
+        platforms: Optional[List[str]] = None,
+        age: int = 0
+) -> ServiceInfo:
+    running_node_ids = running_node_ids or []
+    if task_states is None:
+        task_states = ['running'] * max(len(running_node_ids), 1)
+
+    return ServiceInfo(
+        service_id='id-%s' % name,
+        name=name,
+        image=image,
+        labels=labels or {},
+        mode=mode,
+        replicas=replicas,
+        last_active_at=datetime.now(timezone.utc) - timedelta(seconds=age),
+        update_state=None,
+        constraints=constraints or [],
+        spread_labels=spread_labels or [],
+        max_replicas_per_node=max_replicas_per_node,
+        platforms=platforms or [],
+        task_states=task_states,
+        running_node_ids=running_node_ids
+    )
@@ -0,0 +1,120 @@
+import dataclasses
+from typing import List
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from swarmjanitor.config import JanitorConfig
+from swarmjanitor.peerclient import BreakerState, JanitorPeerClient, PeerUnavailableError
+
+ADDRESS = '10.0.0.1'
+
+
+class Clock:
+    now: float = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    clock = Clock()
+    with patch('swarmjanitor.peerclient.time', clock):
+        yield clock
+
+
+def peer_client(*responses) -> JanitorPeerClient:
+    config = dataclasses.replace(
+        JanitorConfig.from_env(), peer_failure_threshold=2, peer_backoff_initial=60, peer_backoff_max=200
+    )
+    client = JanitorPeerClient(config)
+    client._session = MagicMock()
+    client._session.get.side_effect = list(responses)
+    return client
+
+
+def response(status_code: int = 200) -> MagicMock:
+    result = MagicMock(status_code=status_code)
+    result.json.return_value = {}
+    return result
+
+
+def fail(client: JanitorPeerClient, times: int):
+    for _ in range(times):
+        with pytest.raises(requests.RequestException):
+            client.get_json(ADDRESS, '/system')
+
+
+def states(client: JanitorPeerClient) -> List[BreakerState]:
+    return [breaker.state for breaker in client.list_breakers()]
+
+
+def test_opens_after_threshold(clock):
+    client = peer_client(requests.ConnectionError(), response(503))
+
+    fail(client, 1)
+    assert states(client) == [BreakerState.CLOSED]
+
+    fail(client, 1)
+    assert states(client) == [BreakerState.OPEN]
+    assert client.list_breakers()[0].retry_in == 60
+
+    with pytest.raises(PeerUnavailableError):
+        client.get_json(ADDRESS, '/system')
+    assert client._session.get.call_count == 2
+
+
+def test_backoff_doubles_up_to_maximum(clock):
+    client = peer_client(*[requests.Timeout()] * 5)
+
+    fail(client, 2)
+    for expected_backoff in [120, 200, 200]:
+        clock.now += 1000
+        fail(client, 1)
+        assert client.list_breakers()[0].retry_in == expected_backoff
+
+
+def test_half_open_allows_single_probe(clock):
+    client = peer_client(requests.ConnectionError(), requests.ConnectionError(), response())
+
+    fail(client, 2)
+    clock.now += 61
+    assert states(client) == [BreakerState.HALF_OPEN]
+
+    client._acquire(ADDRESS)
+    with pytest.raises(PeerUnavailableError):
+        client.get_json(ADDRESS, '/system')
+
+
+def test_failed_probe_reopens(clock):
+    client = peer_client(requests.ConnectionError(), requests.ConnectionError(), ValueError())
+
+    fail(client, 2)
+    clock.now += 61
+    with pytest.raises(ValueError):
+        client.get_json(ADDRESS, '/system')
+
+    assert states(client) == [BreakerState.OPEN]
+    assert client.list_breakers()[0].retry_in == 120
+
+
+def test_success_closes(clock):
+    client = peer_client(requests.ConnectionError(), requests.ConnectionError(), response())
+
+    fail(client, 2)
+    clock.now += 61
+    assert client.get_json(ADDRESS, '/system') == {}
+    assert client.list_breakers() == []
+
+
+def test_evicts_idle_breakers(clock):
+    client = peer_client(requests.ConnectionError(), requests.ConnectionError())
+
+    fail(client, 2)
+    clock.now += 60 + 200
+    assert states(client) == [BreakerState.HALF_OPEN]
+
+    clock.now += 1
+    assert client.list_breakers() == []
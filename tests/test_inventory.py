@@ -0,0 +1,39 @@
+from swarmjanitor.dockerclient import DiskUsage
+from swarmjanitor.inventory import _as_node_report
+
+
+def test_parses_node_report():
+    report = _as_node_report({
+        'node_id': 'a',
+        'availability_zone': 'eu-west-1a',
+        'is_manager': True,
+        'is_leader': False,
+        'version': '1.2.0',
+        'disk_usage': {
+            'images': 1, 'images_size': 2, 'containers': 3, 'containers_size': 4, 'volumes': 5, 'volumes_size': 6,
+            'build_cache_size': 7, 'layers_size': 8
+        },
+        'last_prune': {'finished_at': '2024-01-01T00:00:00+00:00', 'space_reclaimed': 1024},
+        'jobs': []
+    })
+
+    assert report.node_id == 'a'
+    assert report.is_manager is True
+    assert report.disk_usage == DiskUsage(1, 2, 3, 4, 5, 6, 7, 8)
+    assert report.last_prune.space_reclaimed == 1024
+
+
+def test_tolerates_other_versions():
+    report = _as_node_report({
+        'node_id': 'a',
+        'version': '1.3.0',
+        'uptime': 3600,
+        'disk_usage': {'images': 1, 'images_size': 2, 'networks': 3},
+        'last_prune': {'finished_at': '2024-01-01T00:00:00+00:00', 'space_reclaimed': 1024, 'duration': 5}
+    })
+
+    assert report.version == '1.3.0'
+    assert report.availability_zone == ''
+    assert report.disk_usage == DiskUsage(1, 2, 0, 0, 0, 0, 0, 0)
+    assert report.last_prune.space_reclaimed == 1024
+    assert report.jobs == []
@@ -0,0 +1,80 @@
+from swarmjanitor.core import _eligible_nodes, _matches_constraint, _task_skew
+from tests.conftest import node, service
+
+
+def test_matches_node_attributes():
+    manager = node('a', is_manager=True)
+
+    assert _matches_constraint(manager, 'node.id==a') is True
+    assert _matches_constraint(manager, 'node.hostname == host-a') is True
+    assert _matches_constraint(manager, 'node.role==manager') is True
+    assert _matches_constraint(manager, 'node.role!=manager') is False
+    assert _matches_constraint(node('b'), 'node.role==worker') is True
+
+
+def test_matches_case_insensitively():
+    assert _matches_constraint(node('a', is_manager=True), 'node.role==Manager') is True
+    assert _matches_constraint(node('a', zone='EU-West-1a'), 'node.labels.zone==eu-west-1a') is True
+    assert _matches_constraint(node('a', zone='EU-West-1a'), 'node.labels.zone!=eu-west-1a') is False
+
+
+def test_matches_missing_label():
+    assert _matches_constraint(node('a'), 'node.labels.zone==eu-west-1a') is False
+    assert _matches_constraint(node('a'), 'node.labels.zone!=eu-west-1a') is True
+
+
+def test_does_not_support_other_constraints():
+    assert _matches_constraint(node('a'), 'engine.labels.os==linux') is None
+    assert _matches_constraint(node('a'), 'node.platform.os==linux') is None
+    assert _matches_constraint(node('a'), 'node.role') is None
+
+
+def test_eligible_nodes():
+    nodes = [node('a', is_manager=True, zone='a'), node('b', zone='a'), node('c', zone='b')]
+
+    assert _eligible_nodes(service(), nodes) == nodes
+    assert _eligible_nodes(service(constraints=['node.role==worker', 'node.labels.zone==a']), nodes) == [nodes[1]]
+    assert _eligible_nodes(service(constraints=['node.labels.zone==c']), nodes) == []
+
+
+def test_eligible_nodes_with_unsupported_constraint():
+    nodes = [node('a'), node('b')]
+
+    assert _eligible_nodes(service(constraints=['node.role==worker', 'node.platform.os==linux']), nodes) is None
+
+
+def test_eligible_nodes_with_placement_limits():
+    nodes = [node('a'), node('b')]
+
+    assert _eligible_nodes(service(max_replicas_per_node=1), nodes) is None
+    assert _eligible_nodes(service(platforms=['linux/arm64']), nodes) is None
+
+
+def test_task_skew_without_spread_preferences():
+    nodes = [node('a'), node('b'), node('c')]
+
+    assert _task_skew(service(running_node_ids=['a', 'b', 'c']), nodes) == 0
+    assert _task_skew(service(running_node_ids=['a', 'a', 'a', 'b']), nodes) == 3
+
+
+def test_task_skew_with_spread_preference():
+    nodes = [node('a1', zone='a'), node('b1', zone='b'), node('b2', zone='b'), node('b3', zone='b')]
+
+    def skew(running_node_ids):
+        return _task_skew(service(running_node_ids=running_node_ids, spread_labels=['node.labels.zone']), nodes)
+
+    # Each zone gets half of the replicas, even though the zones have different numbers of nodes.
+    assert skew(['a1'] * 3 + ['b1', 'b2', 'b3']) == 0
+    assert skew(['a1'] * 3 + ['b1', 'b1', 'b2']) == 2
+    assert skew(['a1', 'b1', 'b2', 'b3']) == 2
+
+
+def test_task_skew_with_nested_spread_preferences():
+    nodes = [
+        node('a1', zone='a', rack='1'), node('a2', zone='a', rack='2'),
+        node('b1', zone='b', rack='1'), node('b2', zone='b', rack='1')
+    ]
+    spread_labels = ['node.labels.zone', 'node.labels.rack']
+
+    assert _task_skew(service(running_node_ids=['a1', 'a2', 'b1', 'b2'], spread_labels=spread_labels), nodes) == 0
+    assert _task_skew(service(running_node_ids=['a1', 'a1', 'b1', 'b2'], spread_labels=spread_labels), nodes) == 2
@@ -0,0 +1,116 @@
+import dataclasses
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from swarmjanitor.config import JanitorConfig
+from swarmjanitor.core import JanitorCore, ServicePruneReason, _service_prune_reason
+from swarmjanitor.dockerclient import JanitorDockerClient
+from tests.conftest import service
+
+
+def config(**changes) -> JanitorConfig:
+    return dataclasses.replace(JanitorConfig.from_env(), **changes)
+
+
+def test_completed_service_is_pruned():
+    assert _service_prune_reason(service(task_states=['complete', 'shutdown']), config()) == \
+        ServicePruneReason.COMPLETED
+
+
+def test_service_with_running_tasks_is_kept():
+    assert _service_prune_reason(service(task_states=['complete', 'running']), config()) is None
+
+
+def test_service_with_shutdown_tasks_only_is_kept():
+    assert _service_prune_reason(service(task_states=['shutdown']), config()) is None
+
+
+def test_service_without_replicas_is_pruned():
+    assert _service_prune_reason(service(replicas=0, task_states=[]), config()) == ServicePruneReason.NO_REPLICAS
+
+
+def test_global_service_without_tasks_is_kept():
+    assert _service_prune_reason(service(mode='Global', replicas=None, task_states=[]), config()) is None
+
+
+def test_running_service_is_kept_without_filters():
+    assert _service_prune_reason(service(), config()) is None
+
+
+def test_image_pattern_matches():
+    janitor_config = config(prune_services_image_pattern=r'/preview-')
+
+    assert _service_prune_reason(service(image='registry.example.com/preview-42:1.0'), janitor_config) == \
+        ServicePruneReason.MATCHED
+    assert _service_prune_reason(service(image='registry.example.com/web:1.0'), janitor_config) is None
+    assert _service_prune_reason(service(image=None), janitor_config) is None
+
+
+def test_label_key_matches():
+    janitor_config = config(prune_services_label='preview')
+
+    assert _service_prune_reason(service(labels={'preview': 'yes'}), janitor_config) == ServicePruneReason.MATCHED
+    assert _service_prune_reason(service(labels={'stage': 'prod'}), janitor_config) is None
+
+
+def test_label_value_matches():
+    janitor_config = config(prune_services_label='stage=preview')
+
+    assert _service_prune_reason(service(labels={'stage': 'preview'}), janitor_config) == \
+        ServicePruneReason.MATCHED
+    assert _service_prune_reason(service(labels={'stage': 'prod'}), janitor_config) is None
+
+
+def test_image_pattern_and_label_must_both_match():
+    janitor_config = config(prune_services_image_pattern=r'/preview-', prune_services_label='stage=preview')
+
+    assert _service_prune_reason(
+        service(image='registry.example.com/preview-42:1.0', labels={'stage': 'preview'}), janitor_config
+    ) == ServicePruneReason.MATCHED
+    assert _service_prune_reason(
+        service(image='registry.example.com/preview-42:1.0', labels={'stage': 'prod'}), janitor_config
+    ) is None
+
+
+def test_recently_active_services_are_kept():
+    docker_client = MagicMock()
+    docker_client.list_services.return_value = [
+        service(name='old', task_states=['complete'], age=7200),
+        service(name='new', task_states=['complete'], age=1800),
+        service(name='older', task_states=['complete'], age=10800)
+    ]
+    core = JanitorCore(config(prune_services_min_age=3600), MagicMock(), docker_client, MagicMock())
+
+    candidates = core._find_prunable_services()
+
+    assert [candidate.name for candidate in candidates] == ['older', 'old']
+    assert all(candidate.reason == ServicePruneReason.COMPLETED for candidate in candidates)
+
+
+def docker_timestamp(seconds_ago: int) -> str:
+    return (datetime.now(timezone.utc) - timedelta(seconds=seconds_ago)).strftime('%Y-%m-%dT%H:%M:%S.123456789Z')
+
+
+def test_age_ignores_spec_updates():
+    with patch('docker.from_env'):
+        docker_client = JanitorDockerClient()
+
+    # refresh_auth pushes every spec again, which moves UpdatedAt but neither CreatedAt nor the task timestamps.
+    docker_client.client.api.services.return_value = [
+        {
+            'ID': service_id,
+            'CreatedAt': docker_timestamp(created_ago),
+            'UpdatedAt': docker_timestamp(60),
+            'Spec': {'Name': service_id, 'Mode': {'Replicated': {'Replicas': 1}}, 'TaskTemplate': {}}
+        }
+        for service_id, created_ago in [('finished', 10800), ('restarted', 10800), ('new', 1800)]
+    ]
+    docker_client.client.api.tasks.return_value = [
+        {'ServiceID': 'finished', 'Status': {'State': 'complete', 'Timestamp': docker_timestamp(7200)}},
+        {'ServiceID': 'restarted', 'Status': {'State': 'complete', 'Timestamp': docker_timestamp(7200)}},
+        {'ServiceID': 'restarted', 'Status': {'State': 'complete', 'Timestamp': docker_timestamp(600)}},
+        {'ServiceID': 'new', 'Status': {'State': 'complete', 'Timestamp': docker_timestamp(1700)}}
+    ]
+    core = JanitorCore(config(prune_services_min_age=3600), MagicMock(), docker_client, MagicMock())
+
+    assert [candidate.name for candidate in core._find_prunable_services()] == ['finished']
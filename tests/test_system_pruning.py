@@ -0,0 +1,37 @@
+import logging
+from unittest.mock import patch
+
+from swarmjanitor.dockerclient import JanitorDockerClient
+
+
+def docker_client() -> JanitorDockerClient:
+    with patch('docker.from_env'):
+        return JanitorDockerClient()
+
+
+def test_counts_removed_images_only(caplog):
+    client = docker_client()
+    client.client.images.prune.return_value = {
+        'ImagesDeleted': [
+            {'Untagged': 'registry.example.com/web:1.0'},
+            {'Untagged': 'registry.example.com/web@sha256:0123'},
+            {'Deleted': 'sha256:4567'},
+            {'Deleted': 'sha256:89ab'}
+        ],
+        'SpaceReclaimed': 1024
+    }
+
+    with caplog.at_level(logging.INFO):
+        assert client.prune_images() == 1024
+
+    assert 'Pruned 2 images, reclaimed 1024 bytes.' in caplog.messages
+
+
+def test_counts_removed_volumes(caplog):
+    client = docker_client()
+    client.client.volumes.prune.return_value = {'VolumesDeleted': ['data', 'cache'], 'SpaceReclaimed': None}
+
+    with caplog.at_level(logging.INFO):
+        assert client.prune_volumes() == 0
+
+    assert 'Pruned 2 volumes, reclaimed 0 bytes.' in caplog.messages